@@ -0,0 +1,688 @@
+import base64
+import copy
+import io
+import json
+import os
+import re
+
+import dash
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.colors import qualitative
+from dash import Input, Output, State, ctx, dcc, html
+from dash.exceptions import PreventUpdate
+from numpy.lib import polynomial
+
+from dataset_store import DatasetStore, column_to_strings
+from decimation import lttb_indices
+from fit_cache import FitCache
+from timing import StageTimer, null_timer
+from trig_polynomials import TrigPolynomial, fit_multiple_series
+from years import from_dates_to_year_fractions, from_year_fractions_to_dates
+
+import logging
+log = logging.getLogger('werkzeug')
+log.setLevel(logging.ERROR)
+
+## set LOG_STAGE_TIMINGS=1 to log the latency of each stage of every fit request
+log_stage_timings = os.environ.get("LOG_STAGE_TIMINGS") == "1"
+timing_log = logging.getLogger("stage_timings")
+if log_stage_timings:
+    timing_log.setLevel(logging.INFO)
+    timing_log.addHandler(logging.StreamHandler())
+
+## fits are shared across requests and users, set FIT_CACHE_DIR to keep them across restarts
+fit_cache = FitCache(max_size=128, cache_dir=os.environ.get("FIT_CACHE_DIR"))
+
+## uploads are parsed once and kept server side, the browser only holds the upload id and column names
+dataset_store = DatasetStore(os.environ.get("DATASET_STORE_DIR"))
+
+## the textboxes only show this many values of a stored column
+preview_rows = 1000
+
+
+## comma separated values of a stored column as shown in the textboxes, truncated for large columns
+def column_preview(values):
+    preview = ",".join(column_to_strings(values[:preview_rows]))
+    return preview if len(values) <= preview_rows else preview + ",..."
+
+
+## whether a textbox still holds (an edited copy of) a truncated column preview
+def is_truncated_preview(values_string):
+    return (values_string or "").endswith(",...")
+
+
+## values of a stored column as floats, date columns are not valid numeric input
+def stored_column_to_floats(values):
+    if np.issubdtype(values.dtype, np.datetime64):
+        raise ValueError("date columns are not numeric")
+    return np.asarray(values, dtype=float)
+
+
+## x values of a stored column, as year fractions for time series
+def stored_column_to_x_values(values, time_series):
+    if not time_series:
+        return stored_column_to_floats(values)
+    if not np.issubdtype(values.dtype, np.datetime64):
+        values = column_to_strings(values)
+    return from_dates_to_year_fractions(values)
+
+
+## returns the error message for an invalid frequency range, or None when it is valid
+def frequency_error_message(min_frequency, max_frequency):
+    if min_frequency == None:
+        return "Error: you must specify a min frequency"
+    elif max_frequency == None:
+        return "Error: you must specify a max frequency"
+    elif min_frequency > max_frequency:
+        return "Error: min frequency must be less than max frequency"
+    elif (min_frequency < 0) | (max_frequency < 0):
+        return "Error: min and max frequency must be non-negative"
+    return None
+
+
+def generate_extrapolation_fig(
+    x_plot: list,
+    y_plot: list,
+    x_train: list,
+    y_train: list,
+    x_range: list,
+    b_min: float = 0,
+    b_max: float = 2,
+    num_points=1000,
+    time_series=False,
+    search="grid",
+    grid_size=20,
+    fit_cache=None,
+    timer=null_timer,
+    max_plot_points=5000,
+    webgl_threshold=2000,
+) -> go.Figure:
+    ## x_plot and y_plot are the data points that you are plotting
+    ## x_train and y_train are a subset of x_plot and y_plot used to generate the trig polynomial
+    ## x_min, x_max is used to generate the grid that is passed to the trig polynomial to plot the fitted function
+    ## even if x_plot, x_train are meant to be timestamps, they should be passed to this function as floats
+    ## timer is an optional StageTimer that records how long each stage takes
+    ## only the plotted data points are downsampled to max_plot_points, the fit always uses all of x_train, y_train
+    ## above webgl_threshold data points the markers are drawn with webgl instead of svg
+
+    x_min, x_max = x_range
+    x_grid = np.linspace(x_min, x_max, num_points)
+
+    ## instantiate an object of the TrigPolynomial class
+    ## it contains the interpolation function and polynomial metadata
+    trig_polynomial = TrigPolynomial(timer)
+    error = None
+
+    ## reuse a previous fit of the same data and search parameters when there is one
+    with timer.stage("fit_cache"):
+        if fit_cache is not None:
+            fit_key = fit_cache.key(x_train, y_train, b_min, b_max, grid_size, TrigPolynomial.basis, search)
+            fit = fit_cache.get(fit_key)
+        else:
+            fit = None
+
+    ## creates a trig polynomial of degree n that fits the data
+    ## the periodogram search scales with the frequency range instead of the square of the grid size
+    with timer.stage("search"):
+        if fit is not None:
+            trig_polynomial.set_optimal_trig_polynomial(
+                x_train, y_train, fit["coefs"], fit["b1"], fit["b2"], fit["r2"]
+            )
+        elif search == "periodogram":
+            trig_polynomial.periodogram_search_polynomial_coefficients(x_train, y_train, b_min, b_max)
+        else:
+            trig_polynomial.grid_search_polynomial_coefficients(
+                x_train, y_train, b_min, b_max, grid_size
+            )
+    with timer.stage("fit_cache"):
+        if fit is None and fit_cache is not None:
+            fit_cache.put(fit_key, trig_polynomial.fitted_parameters())
+
+    with timer.stage("curve_evaluation"):
+        y_grid = trig_polynomial.polynomial_function(x_grid)
+
+    ## downsample the data points for display with a shape preserving algorithm
+    num_data_points = len(x_plot)
+    with timer.stage("decimation"):
+        if (max_plot_points is not None) and (num_data_points > max_plot_points):
+            kept = lttb_indices(x_plot, y_plot, max_plot_points)
+            x_plot, y_plot = np.asarray(x_plot)[kept], np.asarray(y_plot)[kept]
+            data_points_name = f"data points ({max_plot_points} of {num_data_points} shown)"
+        else:
+            data_points_name = "data points"
+    polynomial_equation = trig_polynomial.polynomial_string
+    polynomial_coefficents = trig_polynomial.coefficient_string
+    r2 = trig_polynomial.r2_string
+
+    ## plot the trigonometric polynomial best fit function using a grid
+    ## if time_series, then cast the x_grid and x_plot as timestamps
+    ## and replace all variable instances of x with t
+    if time_series:
+        with timer.stage("year_fraction_to_date"):
+            x_grid = from_year_fractions_to_dates(x_grid)
+            x_plot = from_year_fractions_to_dates(x_plot)
+        title = re.sub(r"(?<=[\d\(])x", "t", polynomial_coefficents + polynomial_equation + r2)
+    else:
+        title = polynomial_coefficents + polynomial_equation + r2
+
+    ## create figure
+    with timer.stage("figure_construction"):
+        fig = go.Figure()
+
+        ## plot the data with markers
+        scatter = go.Scattergl if num_data_points > webgl_threshold else go.Scatter
+        fig.add_trace(
+            scatter(
+                x=x_plot,
+                y=y_plot,
+                mode="markers",
+                marker=dict(color="darkviolet"),
+                name=data_points_name,
+            )
+        )
+
+        fig.add_trace(
+            go.Scatter(
+                x=x_grid,
+                y=y_grid,
+                mode="lines",
+                line=dict(color="salmon"),
+                name="fitted function",
+            )
+        )
+
+        fig.update_layout(title=title, margin=dict(l=0), font=dict(size=12))
+    return fig
+
+
+def generate_multi_series_fig(
+    x_plot,
+    y_matrix,
+    names: list,
+    x_range: list,
+    b_min: float = 0,
+    b_max: float = 2,
+    num_points=1000,
+    time_series=False,
+    grid_size=20,
+    timer=null_timer,
+    max_plot_points=5000,
+    webgl_threshold=2000,
+) -> go.Figure:
+    ## fits every column of y_matrix against the shared x_plot in one batched grid search
+    ## and plots each series with its fitted function in the same color
+    ## pairs are scored by squared error from the normal equations alone, which keeps the cost close
+    ## to that of fitting a single series; the single series fit scores by absolute error, so the
+    ## title says the frequencies were selected by least squares
+    x_plot = np.asarray(x_plot, dtype=float)
+    y_matrix = np.asarray(y_matrix, dtype=float)
+    x_min, x_max = x_range
+    x_grid = np.linspace(x_min, x_max, num_points)
+
+    with timer.stage("search"):
+        trig_polynomials = fit_multiple_series(
+            x_plot, y_matrix, b_min, b_max, grid_size, error="squared"
+        )
+
+    num_data_points = len(x_plot)
+    with timer.stage("year_fraction_to_date"):
+        x_grid_dates = from_year_fractions_to_dates(x_grid) if time_series else x_grid
+    scatter = go.Scattergl if num_data_points > webgl_threshold else go.Scatter
+    variable = "t" if time_series else "x"
+
+    with timer.stage("figure_construction"):
+        fig = go.Figure()
+        for col, (name, trig_polynomial) in enumerate(zip(names, trig_polynomials)):
+            color = qualitative.Plotly[col % len(qualitative.Plotly)]
+
+            ## downsample each series for display separately, the fit used all of the points
+            ## the nested stages are not counted in figure_construction
+            x_col, y_col = x_plot, y_matrix[:, col]
+            if (max_plot_points is not None) and (num_data_points > max_plot_points):
+                with timer.stage("decimation"):
+                    kept = lttb_indices(x_col, y_col, max_plot_points)
+                    x_col, y_col = x_col[kept], y_col[kept]
+            if time_series:
+                with timer.stage("year_fraction_to_date"):
+                    x_col = from_year_fractions_to_dates(x_col)
+            with timer.stage("curve_evaluation"):
+                y_grid = trig_polynomial.polynomial_function(x_grid)
+
+            fig.add_trace(
+                scatter(x=x_col, y=y_col, mode="markers", marker=dict(color=color), name=name)
+            )
+            fig.add_trace(
+                go.Scatter(
+                    x=x_grid_dates,
+                    y=y_grid,
+                    mode="lines",
+                    line=dict(color=color),
+                    name=(
+                        f"{name}: {trig_polynomial.coefs[0]:.2f} {trig_polynomial.coefs[1]:+.2f} "
+                        f"cos {trig_polynomial.b1:.2f}{variable} {trig_polynomial.coefs[2]:+.2f} "
+                        f"sin {trig_polynomial.b2:.2f}{variable}, r² = {trig_polynomial.r2:.2f}"
+                    ),
+                )
+            )
+
+        fig.update_layout(
+            title=f"Fitted {len(names)} series, frequencies selected by least squares", margin=dict(l=0), font=dict(size=12)
+        )
+    return fig
+
+
+def create_dash_app(fig=go.Figure(dict(layout=dict(margin=dict(l=0))))):
+    app = dash.Dash(
+        __name__,
+        # suppress_callback_exceptions=True,
+        external_scripts=[
+            "https://cdnjs.cloudflare.com/ajax/libs/mathjax/2.7.4/MathJax.js?config=TeX-MML-AM_CHTML",
+        ],
+    )
+
+    app.layout = html.Div(
+        [
+            dcc.Graph(figure=fig, id="trig-polynomial-fig", mathjax=True),
+            html.Div(
+                [
+                    dcc.Upload(
+                        id="upload-data",
+                        children=html.Div(
+                            [
+                                "Drag and Drop or ",
+                                html.A("Select a csv file"),
+                            ]
+                        ),
+                        max_size=5 * 10**7,
+                        style={
+                            "height": "60px",
+                            "width": "300px",
+                            "lineHeight": "60px",
+                            "borderWidth": "1px",
+                            "borderStyle": "dashed",
+                            "borderRadius": "5px",
+                            "textAlign": "center",
+                        },
+                    ),
+                    html.H5(
+                        "OR",
+                        style={
+                            "padding-left": "10px",
+                            "padding-right": "10px",
+                            "vertical-align": "middle",
+                        },
+                    ),
+                    html.Button(
+                        "Load stocks data set",
+                        id="load-stocks",
+                        n_clicks=0,
+                        style={"height": "30px"},
+                    ),
+                ],
+                style={
+                    "display": "flex",
+                    "padding-left": "10px",
+                    "align-items": "center",
+                    "vertical-align": "middle",
+                },
+            ),
+            html.Br(),
+            html.Div(
+                id="data-upload-message",
+                style={
+                    "whiteSpace": "pre-line",
+                    "color": "red",
+                    "padding-left": "10px",
+                },
+            ),
+            html.Div(
+                [
+                    dcc.Dropdown(
+                        id="x-column-dropdown",
+                        options=[],
+                        searchable=True,
+                        placeholder="Select your x column",
+                        style={"display": "inline-block", "width": "180px"},
+                    ),
+                    dcc.Dropdown(
+                        id="y-column-dropdown",
+                        options=[],
+                        searchable=True,
+                        placeholder="Select your y column",
+                        style={"display": "inline-block", "width": "180px"},
+                    ),
+                ],
+                style={"padding": "10px"},
+            ),
+            dcc.Checklist(["time series"], [], id="is-timeseries", style={"padding-left": "6px"}),
+            dcc.Checklist(
+                ["fit all numeric columns (least squares grid search)"],
+                [],
+                id="fit-all-columns",
+                style={"padding-left": "6px"},
+            ),
+            html.Br(),
+            dcc.Store(id="csv-data"),
+            html.Div(
+                [
+                    dcc.Textarea(
+                        className="xvalues-string",
+                        id="xvalues-string",
+                        value="",
+                        placeholder="Enter x-values separated by commas",
+                        style={"width": "175px", "height": 50, "resize": "none"},
+                        draggable=False,
+                    ),
+                    dcc.Textarea(
+                        id="yvalues-string",
+                        placeholder="Enter y-values separated by commas",
+                        value="",
+                        style={"width": "175px", "height": 50, "resize": "none"},
+                        draggable=False,
+                    ),
+                ],
+                style={"padding-left": "10px"},
+            ),
+            html.H4("Enter the frequency range to search:", style={"padding-left": "10px"}),
+            html.Div(
+                [
+                    dcc.Input(id="min-frequency", placeholder="Min frequency", type="number"),
+                    dcc.Input(
+                        id="max-frequency",
+                        placeholder="Max frequency",
+                        type="number",
+                    ),
+                ],
+                style={"padding-left": "10px"},
+            ),
+            dcc.RadioItems(
+                {"grid": "grid search", "periodogram": "periodogram search"},
+                "grid",
+                id="search-mode",
+                inline=True,
+                style={"padding-left": "6px", "padding-top": "6px"},
+            ),
+            html.Br(),
+            html.Div(
+                [
+                    html.Button(
+                        "Generate extrapolation plot",
+                        id="generate-plot",
+                        n_clicks=0,
+                        style={"whiteSpace": "pre-wrap"},
+                    )
+                ],
+                style={"padding-left": "10px"},
+            ),
+            html.Br(),
+            html.Div(
+                id="error-output",
+                style={
+                    "whiteSpace": "pre-line",
+                    "color": "red",
+                    "padding-left": "10px",
+                },
+            ),
+        ]
+    )
+
+    ## this callback processes the input and stores the dataframe
+    @app.callback(
+        Output("csv-data", "data"),
+        Output("x-column-dropdown", "options"),
+        Output("y-column-dropdown", "options"),
+        Output("data-upload-message", "children"),
+        Output("is-timeseries", "value"),
+        Input("upload-data", "contents"),
+        Input("load-stocks", "n_clicks"),
+        State("upload-data", "filename"),
+        prevent_initial_call=True,
+    )
+    def parse_csv_and_fill_dropdowns(contents, stocks_nclicks, filename):
+        ## a million rows is the largest size the fit and plot paths were measured with (under 1 GB peak)
+        max_rows = 10**6
+        if ctx.triggered_id == "load-stocks":
+            upload_id = dataset_store.save_csv("./tests/stocks.csv")
+
+            return (
+                {"upload_id": upload_id, "columns": dataset_store.columns(upload_id)},
+                ["date"],
+                ["GOOG", "AAPL", "AMZN", "FB", "NFLX", "MSFT"],
+                "Stocks data successfully loaded!",
+                ["time series"],
+            )
+        else:
+            if not filename.endswith(".csv"):
+                error_message = "Error: you must upload a .csv file"
+                return None, [], [], error_message, []
+            else:
+                try:
+                    content_type, content_string = contents.split(",")
+                    decoded = base64.b64decode(content_string)
+                    df_input = pd.read_csv(io.BytesIO(decoded))
+                    if len(df_input) > max_rows:
+                        error_message = (
+                            f"The csv file exceeds the maximum allowable limit of {max_rows} rows"
+                        )
+                        return None, [], [], error_message, []
+                    else:
+                        upload_id = dataset_store.save(df_input, decoded)
+                        all_cols = dataset_store.columns(upload_id)
+                        dropdown_options = [{"label": col, "value": col} for col in all_cols]
+                        return (
+                            {"upload_id": upload_id, "columns": all_cols},
+                            dropdown_options,
+                            dropdown_options,
+                            "Data successfully loaded!",
+                            [],
+                        )
+
+                except Exception as e:
+                    error_message = "Error: your csv file could not be processed"
+                    return None, [], [], error_message, []
+
+    ## this callback uses the selected x- and y- columns of the stored dataset to populate the textboxes
+    @app.callback(
+        Output("xvalues-string", "value"),
+        Output("yvalues-string", "value"),
+        Input("csv-data", "data"),
+        Input("x-column-dropdown", "value"),
+        Input("y-column-dropdown", "value"),
+        prevent_initial_call=True,
+    )
+    def fill_textboxes(csv_data, x_col, y_col):
+        if csv_data == None:
+            return "", ""
+        upload_id = csv_data["upload_id"]
+        x_values = "" if x_col == None else column_preview(dataset_store.load_column(upload_id, x_col))
+        y_values = "" if y_col == None else column_preview(dataset_store.load_column(upload_id, y_col))
+        return x_values, y_values
+
+    ## this callback processes the x-values and y-values textboxes and creates the figure
+    @app.callback(
+        Output("trig-polynomial-fig", "figure"),
+        Output("error-output", "children"),
+        Input("generate-plot", "n_clicks"),
+        [
+            State("is-timeseries", "value"),
+            State("fit-all-columns", "value"),
+            State("min-frequency", "value"),
+            State("max-frequency", "value"),
+            State("search-mode", "value"),
+            State("xvalues-string", "value"),
+            State("yvalues-string", "value"),
+            State("csv-data", "data"),
+            State("x-column-dropdown", "value"),
+            State("y-column-dropdown", "value"),
+        ],
+        prevent_initial_call=True,
+    )
+    def update_graph(
+        n_clicks,
+        is_timeseries,
+        fit_all_columns,
+        min_frequency,
+        max_frequency,
+        search_mode,
+        xvalues_string,
+        yvalues_string,
+        csv_data,
+        x_col,
+        y_col,
+    ):
+        ## return figure, rendered polynomial latex string, and empty error message
+        ## keep the default text when the app first loads
+        ## when there is any type of error, remove the equations (by resetting the title text and changing the color to white)
+
+        ## load an empty plot before any x or v-values are processed
+        # if n_clicks == 0:
+        #     return go.Figure(dict(layout=dict(margin=dict(l=0)))), ""
+
+        timer = StageTimer() if log_stage_timings else null_timer
+
+        ## fit every numeric column of the stored data set against the selected x column at once
+        if len(fit_all_columns) > 0:
+            if (csv_data == None) | (x_col == None):
+                error_message = "Error: you must load a data set and select an x column to fit all columns"
+                return dash.no_update, error_message
+            elif frequency_error_message(min_frequency, max_frequency) != None:
+                return dash.no_update, frequency_error_message(min_frequency, max_frequency)
+            elif search_mode != "grid":
+                error_message = "Error: fitting all columns only supports grid search"
+                return dash.no_update, error_message
+            try:
+                upload_id = csv_data["upload_id"]
+                y_cols = [
+                    col
+                    for col in dataset_store.columns(upload_id)
+                    if (col != x_col)
+                    and not col.startswith("Unnamed")
+                    and np.issubdtype(dataset_store.load_column(upload_id, col).dtype, np.number)
+                ]
+                x_column = dataset_store.load_column(upload_id, x_col)
+            except (KeyError, ValueError, OSError) as e:
+                error_message = "Error: the data set is no longer available, please load it again"
+                return dash.no_update, error_message
+            if len(y_cols) == 0:
+                error_message = "Error: there are no numeric columns to fit"
+                return dash.no_update, error_message
+            try:
+                with timer.stage("date_to_year_fraction" if len(is_timeseries) > 0 else "input_parse"):
+                    xvalues_list = stored_column_to_x_values(x_column, len(is_timeseries) > 0)
+            except ValueError as e:
+                error_message = "Error: invalid x-value input!"
+                return dash.no_update, error_message
+            with timer.stage("input_parse"):
+                y_matrix = np.column_stack(
+                    [stored_column_to_floats(dataset_store.load_column(upload_id, col)) for col in y_cols]
+                )
+
+            x_min, x_max = np.min(xvalues_list), np.max(xvalues_list)
+            x_range_padding = (x_max - x_min) / 2
+            fig = generate_multi_series_fig(
+                x_plot=xvalues_list,
+                y_matrix=y_matrix,
+                names=y_cols,
+                x_range=[x_min - x_range_padding, x_max + x_range_padding],
+                b_min=min_frequency,
+                b_max=max_frequency,
+                time_series=len(is_timeseries) > 0,
+                timer=timer,
+            )
+            if log_stage_timings:
+                timing_log.info(json.dumps({"num_points": y_matrix.size, **timer.timings}))
+            return fig, ""
+
+        ## read the selected columns straight from the dataset store, unless the textboxes were edited
+        x_column, y_column = None, None
+        dataset_missing = False
+        with timer.stage("input_parse"):
+            if (csv_data != None) & (x_col != None) & (y_col != None):
+                try:
+                    x_column = dataset_store.load_column(csv_data["upload_id"], x_col)
+                    y_column = dataset_store.load_column(csv_data["upload_id"], y_col)
+                except (KeyError, ValueError, OSError) as e:
+                    x_column, y_column = None, None
+                    dataset_missing = True
+                if (x_column is not None) and (
+                    (xvalues_string != column_preview(x_column))
+                    | (yvalues_string != column_preview(y_column))
+                ):
+                    x_column, y_column = None, None
+
+        ## a truncated preview only shows the first values of a column, so it can't be fitted once edited
+        if (x_column is None) & (is_truncated_preview(xvalues_string) | is_truncated_preview(yvalues_string)):
+            if dataset_missing:
+                error_message = "Error: the data set is no longer available, please load it again"
+                return dash.no_update, error_message
+            error_message = (
+                f"Error: the textboxes only show the first {preview_rows} values of this column, "
+                "please edit the csv file and upload it again instead"
+            )
+            return dash.no_update, error_message
+
+        ## ensure numbers have been entered for x and y values
+        try:
+            ## convert string of timestamps to epoch in ns (since 1970-01-01)
+            if len(is_timeseries) == 0:
+                time_series = False
+                with timer.stage("input_parse"):
+                    if x_column is not None:
+                        xvalues_list = stored_column_to_x_values(x_column, time_series)
+                    else:
+                        xvalues_list = [float(val) for val in xvalues_string.split(",")]
+            else:
+                time_series = True
+                with timer.stage("date_to_year_fraction"):
+                    if x_column is not None:
+                        xvalues_list = stored_column_to_x_values(x_column, time_series)
+                    else:
+                        xvalues_list = from_dates_to_year_fractions(xvalues_string.split(",")).tolist()
+
+        except ValueError as e:
+            error_message = "Error: invalid x-value input!"
+            return dash.no_update, error_message
+        try:
+            with timer.stage("input_parse"):
+                if y_column is not None:
+                    yvalues_list = stored_column_to_floats(y_column)
+                else:
+                    yvalues_list = [float(val) for val in yvalues_string.split(",")]
+        except ValueError as e:
+            error_message = "Error: invalid y-value input!"
+            return dash.no_update, error_message
+        if len(xvalues_list) != len(yvalues_list):
+            error_message = "Error: there must be an equal number of x- and y-values!"
+            return dash.no_update, error_message
+        elif frequency_error_message(min_frequency, max_frequency) != None:
+            return dash.no_update, frequency_error_message(min_frequency, max_frequency)
+        else:
+            x_min, x_max = np.min(xvalues_list), np.max(xvalues_list)
+            x_range_padding = (x_max - x_min) / 2
+            x_range = [x_min - x_range_padding, x_max + x_range_padding]
+            fig = generate_extrapolation_fig(
+                x_plot=xvalues_list,
+                y_plot=yvalues_list,
+                x_train=xvalues_list,
+                y_train=yvalues_list,
+                x_range=x_range,
+                b_min=min_frequency,
+                b_max=max_frequency,
+                time_series=time_series,
+                search=search_mode,
+                fit_cache=fit_cache,
+                timer=timer,
+            )
+            if log_stage_timings:
+                timing_log.info(json.dumps({"num_points": len(xvalues_list), **timer.timings}))
+            return fig, ""
+
+    return app
+
+
+## set debug=False when deploying live
+if __name__ == "__main__":
+    app = create_dash_app()
+    app.run_server(debug=True, host="0.0.0.0", port=8080)
@@ -0,0 +1,197 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app import generate_extrapolation_fig
+from timing import StageTimer
+from trig_polynomials import TrigPolynomial
+from years import from_dates_to_year_fractions
+
+## the bundled data sets and the y column benchmarked for each of them
+datasets = {"stocks": ("./tests/stocks.csv", "GOOG"), "sunspots": ("./tests/sunspots.csv", "swpc_ssn")}
+
+
+## loads the x (as year fractions) and y values of a bundled time series csv
+def load_time_series(path, y_col, num_rows=None):
+    df = pd.read_csv(path)
+    if num_rows is not None:
+        df = df.head(num_rows)
+    x_vals = from_dates_to_year_fractions(df["date"])
+    y_vals = df[y_col].to_numpy(dtype=float)
+    return x_vals, y_vals
+
+
+## times a single call of fn, repeating it and keeping the fastest run
+def time_call(fn, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+## compares the original python loop against the vectorized grid search engine
+def benchmark_grid_search(x_vals, y_vals, b_min=0, b_max=2, grid_size=20, repeat=3):
+    results = {}
+    for engine in ["loop", "vectorized"]:
+        trig_polynomial = TrigPolynomial()
+        results[engine] = time_call(
+            lambda: trig_polynomial.grid_search_polynomial_coefficients(
+                x_vals, y_vals, b_min, b_max, grid_size, engine=engine
+            ),
+            repeat,
+        )
+    results["speedup"] = results["loop"] / results["vectorized"]
+    return results
+
+
+## compares the exhaustive grid search against the periodogram seeded search
+## reporting the runtime, number of least squares solves, periodogram frequencies and r^2 of each mode
+def benchmark_search_modes(x_vals, y_vals, b_min=0, b_max=2, grid_size=20, repeat=3):
+    results = {}
+    for mode in ["grid", "periodogram"]:
+        trig_polynomial = TrigPolynomial()
+        if mode == "grid":
+            search = lambda: trig_polynomial.grid_search_polynomial_coefficients(
+                x_vals, y_vals, b_min, b_max, grid_size
+            )
+        else:
+            search = lambda: trig_polynomial.periodogram_search_polynomial_coefficients(
+                x_vals, y_vals, b_min, b_max
+            )
+        results[mode] = {
+            "seconds": time_call(search, repeat),
+            "num_solves": trig_polynomial.num_solves,
+            "num_periodogram_frequencies": trig_polynomial.num_periodogram_frequencies,
+            "r2": trig_polynomial.calculate_rsquared(x_vals, y_vals),
+        }
+    return results
+
+
+## measures how the parallel grid search scales from 1 up to max_workers processes
+def benchmark_parallel_scaling(x_vals, y_vals, b_min=0, b_max=2, grid_size=100, max_workers=None, repeat=3):
+    results = {}
+    for num_workers in range(1, (max_workers or os.cpu_count() or 1) + 1):
+        trig_polynomial = TrigPolynomial()
+        results[num_workers] = time_call(
+            lambda: trig_polynomial.grid_search_polynomial_coefficients(
+                x_vals, y_vals, b_min, b_max, grid_size, engine="parallel", num_workers=num_workers
+            ),
+            repeat,
+        )
+    return results
+
+
+## times each stage of the fit pipeline separately, keeping the fastest of repeat runs per stage
+def benchmark_stages(path, y_col, num_rows, grid_size=20, b_min=0, b_max=2, repeat=3):
+    results = {}
+    for _ in range(repeat):
+        timer = StageTimer()
+        with timer.stage("csv_parse"):
+            df = pd.read_csv(path, nrows=num_rows)
+        with timer.stage("date_to_year_fraction"):
+            x_vals = from_dates_to_year_fractions(df["date"])
+        y_vals = df[y_col].to_numpy(dtype=float)
+
+        x_range_padding = (x_vals.max() - x_vals.min()) / 2
+        generate_extrapolation_fig(
+            x_plot=x_vals,
+            y_plot=y_vals,
+            x_train=x_vals,
+            y_train=y_vals,
+            x_range=[x_vals.min() - x_range_padding, x_vals.max() + x_range_padding],
+            b_min=b_min,
+            b_max=b_max,
+            time_series=True,
+            grid_size=grid_size,
+            timer=timer,
+        )
+        for stage, seconds in timer.timings.items():
+            results[stage] = min(results.get(stage, np.inf), seconds)
+    results["total"] = sum(results.values())
+    return results
+
+
+## identifies the code and environment the results were measured with
+def environment_metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmarks(suites, sizes, grid_sizes, repeat):
+    results = {suite: [] for suite in suites}
+    for dataset, (path, y_col) in datasets.items():
+        num_rows_available = len(pd.read_csv(path, usecols=[0]))
+        dataset_sizes = sorted({min(size, num_rows_available) for size in sizes})
+        for num_rows in dataset_sizes:
+            x_vals, y_vals = load_time_series(path, y_col, num_rows)
+            for grid_size in grid_sizes:
+                record = {"dataset": dataset, "num_rows": num_rows, "grid_size": grid_size}
+                if "stages" in suites:
+                    results["stages"].append(
+                        {**record, **benchmark_stages(path, y_col, num_rows, grid_size, repeat=repeat)}
+                    )
+                if "engines" in suites:
+                    results["engines"].append(
+                        {**record, **benchmark_grid_search(x_vals, y_vals, grid_size=grid_size, repeat=repeat)}
+                    )
+                if "search" in suites:
+                    for mode, mode_results in benchmark_search_modes(
+                        x_vals, y_vals, grid_size=grid_size, repeat=repeat
+                    ).items():
+                        results["search"].append({**record, "mode": mode, **mode_results})
+                if "parallel" in suites:
+                    for num_workers, seconds in benchmark_parallel_scaling(
+                        x_vals, y_vals, grid_size=grid_size, repeat=repeat
+                    ).items():
+                        results["parallel"].append({**record, "num_workers": num_workers, "seconds": seconds})
+    return results
+
+
+## run from the directory containing app.py, e.g.
+## python benchmarks.py --suites stages engines --output bench.json
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark the trig polynomial fit pipeline")
+    parser.add_argument(
+        "--suites",
+        nargs="+",
+        choices=["stages", "engines", "search", "parallel"],
+        default=["stages"],
+    )
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100, 1000, 10000])
+    parser.add_argument("--grid-sizes", nargs="+", type=int, default=[10, 20, 40])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the json results to this file instead of stdout")
+    args = parser.parse_args()
+
+    ## keep stdout for the json report only
+    with contextlib.redirect_stdout(sys.stderr):
+        report = {
+            "environment": environment_metadata(),
+            "results": run_benchmarks(args.suites, args.sizes, args.grid_sizes, args.repeat),
+        }
+    if args.output is None:
+        print(json.dumps(report, indent=2))
+    else:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
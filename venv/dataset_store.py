@@ -0,0 +1,96 @@
+import hashlib
+import io
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+
+class DatasetStore:
+    ## keeps parsed uploads on the server as one memory-mappable .npy file per column
+    ## so only the upload id and column names need to be sent to the browser
+    def __init__(self, root_dir=None, max_datasets=32):
+        if root_dir is None:
+            root_dir = os.path.join(tempfile.gettempdir(), "trig_least_squares_datasets")
+        self.root_dir = root_dir
+        self.max_datasets = max_datasets
+        os.makedirs(root_dir, exist_ok=True)
+
+    ## uploads are content addressed, so the same file uploaded twice is only stored once
+    def save(self, df, raw_bytes):
+        upload_id = hashlib.sha256(raw_bytes).hexdigest()
+        dataset_dir = os.path.join(self.root_dir, upload_id)
+        if os.path.exists(os.path.join(dataset_dir, "columns.json")):
+            os.utime(dataset_dir)
+            return upload_id
+
+        tmp_dir = tempfile.mkdtemp(dir=self.root_dir)
+        columns = []
+        for i, col in enumerate(df.columns):
+            np.save(os.path.join(tmp_dir, f"{i}.npy"), self.typed_column(df[col]))
+            columns.append(str(col))
+        with open(os.path.join(tmp_dir, "columns.json"), "w") as f:
+            json.dump(columns, f)
+
+        ## another request may have stored the same upload in the meantime
+        try:
+            os.rename(tmp_dir, dataset_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        self.evict()
+        return upload_id
+
+    def save_csv(self, path):
+        with open(path, "rb") as f:
+            raw_bytes = f.read()
+        return self.save(pd.read_csv(io.BytesIO(raw_bytes)), raw_bytes)
+
+    def columns(self, upload_id):
+        with open(os.path.join(self.dataset_dir(upload_id), "columns.json")) as f:
+            return json.load(f)
+
+    ## returns the column as a read-only memory-mapped array
+    def load_column(self, upload_id, col):
+        i = self.columns(upload_id).index(col)
+        return np.load(os.path.join(self.dataset_dir(upload_id), f"{i}.npy"), mmap_mode="r")
+
+    def dataset_dir(self, upload_id):
+        ## upload ids come back from the browser, so only accept hex digests
+        if not (len(upload_id) == 64 and all(c in "0123456789abcdef" for c in upload_id)):
+            raise KeyError(upload_id)
+        return os.path.join(self.root_dir, upload_id)
+
+    ## numeric columns keep their numeric dtype, date columns become datetime64 and the rest strings
+    ## timezone-aware dates keep their local wall clock time, like from_dates_to_year_fractions
+    def typed_column(self, col):
+        if pd.api.types.is_numeric_dtype(col):
+            return col.to_numpy()
+        try:
+            dates = pd.to_datetime(col)
+            if getattr(dates.dt, "tz", None) is not None:
+                dates = dates.dt.tz_localize(None)
+            return dates.to_numpy(dtype="datetime64[ns]")
+        except (ValueError, TypeError, OverflowError):
+            return col.astype(str).to_numpy(dtype=str)
+
+    ## removes the least recently stored datasets beyond max_datasets
+    def evict(self):
+        dataset_dirs = [
+            os.path.join(self.root_dir, name)
+            for name in os.listdir(self.root_dir)
+            if os.path.exists(os.path.join(self.root_dir, name, "columns.json"))
+        ]
+        dataset_dirs.sort(key=os.path.getmtime)
+        for dataset_dir in dataset_dirs[: max(len(dataset_dirs) - self.max_datasets, 0)]:
+            shutil.rmtree(dataset_dir, ignore_errors=True)
+
+
+## string representation of a stored column, matching how the textareas display values
+def column_to_strings(values):
+    if np.issubdtype(values.dtype, np.datetime64):
+        return pd.DatetimeIndex(values).astype(str).tolist()
+    return pd.Series(values).astype(str).tolist()
+
@@ -0,0 +1,37 @@
+import numpy as np
+
+
+## largest triangle three buckets downsampling: keeps the first and last point and, from each bucket
+## in between, the point forming the largest triangle with the previously kept point and the mean
+## of the next bucket, which preserves the visual shape of the series
+## returns the sorted indices of the num_out points to keep
+def lttb_indices(x_vals, y_vals, num_out):
+    x_vals = np.asarray(x_vals, dtype=float)
+    y_vals = np.asarray(y_vals, dtype=float)
+    n = len(x_vals)
+    if num_out >= n or num_out < 3:
+        return np.arange(n)
+
+    ## lttb needs the points in x order, indices are mapped back at the end
+    order = np.argsort(x_vals, kind="stable")
+    x_sorted, y_sorted = x_vals[order], y_vals[order]
+
+    ## the first and last points are kept as is, the rest is split into num_out - 2 buckets
+    bucket_edges = np.linspace(1, n - 1, num_out - 1).astype(int)
+    kept = np.empty(num_out, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+
+    for b in range(num_out - 2):
+        start, stop = bucket_edges[b], bucket_edges[b + 1]
+        next_stop = bucket_edges[b + 2] if b + 2 < len(bucket_edges) else n
+        next_x = x_sorted[stop:next_stop].mean()
+        next_y = y_sorted[stop:next_stop].mean()
+
+        prev_x, prev_y = x_sorted[kept[b]], y_sorted[kept[b]]
+        areas = np.abs(
+            (prev_x - next_x) * (y_sorted[start:stop] - prev_y)
+            - (prev_x - x_sorted[start:stop]) * (next_y - prev_y)
+        )
+        kept[b + 1] = start + np.argmax(areas)
+
+    return np.sort(order[kept])
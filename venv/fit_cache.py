@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class FitCache:
+    ## stores the optimal frequencies, coefficients and r^2 of a fit keyed by a hash of its inputs
+    ## the in-memory tier is bounded with LRU eviction, the optional on-disk tier survives restarts
+    ## and is bounded to max_disk_entries files, evicting the least recently used by mtime
+    def __init__(self, max_size=128, cache_dir=None, max_disk_entries=1024):
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self.fits = OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    ## content-addressed key: the raw bytes of the x/y arrays plus every parameter that affects the fit
+    def key(self, x_vals, y_vals, b_min, b_max, grid_size, basis, search="grid"):
+        h = hashlib.sha256()
+        for vals in [x_vals, y_vals]:
+            vals = np.ascontiguousarray(vals, dtype=float)
+            h.update(str(vals.shape).encode())
+            h.update(vals.tobytes())
+        h.update(json.dumps([float(b_min), float(b_max), grid_size, basis, search]).encode())
+        return h.hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.fits:
+                self.fits.move_to_end(key)
+                self.hits += 1
+                return self.fits[key]
+
+            fit = self.read_from_disk(key)
+            if fit is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self.store_in_memory(key, fit)
+            return fit
+
+    def put(self, key, fit):
+        with self.lock:
+            self.store_in_memory(key, fit)
+            self.write_to_disk(key, fit)
+
+    def stats(self):
+        return {
+            "size": len(self.fits),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+    def store_in_memory(self, key, fit):
+        self.fits[key] = fit
+        self.fits.move_to_end(key)
+        while len(self.fits) > self.max_size:
+            self.fits.popitem(last=False)
+
+    def disk_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def read_from_disk(self, key):
+        if self.cache_dir is None or not os.path.exists(self.disk_path(key)):
+            return None
+        try:
+            with open(self.disk_path(key)) as f:
+                fit = json.load(f)
+            ## a disk hit counts as a use, so the entry is not the next one evicted
+            os.utime(self.disk_path(key))
+            return fit
+        except (OSError, ValueError):
+            return None
+
+    ## writes to a temporary file first so a crash never leaves a partial entry behind
+    def write_to_disk(self, key, fit):
+        if self.cache_dir is None:
+            return
+        tmp_path = f"{self.disk_path(key)}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(fit, f)
+        os.replace(tmp_path, self.disk_path(key))
+        self.evict_from_disk()
+
+    ## removes the least recently used entries beyond max_disk_entries, like DatasetStore.evict
+    def evict_from_disk(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            ## other processes sharing the directory may remove entries concurrently
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        entries.sort()
+        for _, path in entries[: max(len(entries) - self.max_disk_entries, 0)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,144 @@
+from collections import deque
+
+import numpy as np
+
+from trig_polynomials import TrigPolynomial
+
+
+class StreamingTrigPolynomial:
+    ## refits a TrigPolynomial as new points arrive without revisiting old data
+    ## for every (b1, b2) pair on the grid it keeps the sums that make up A^T A, A^T y and y^T y,
+    ## which are updated in O(1) per pair for each appended point and downdated when a point
+    ## leaves the optional sliding window
+    def __init__(self, b_min, b_max, grid_size=20, window=None):
+        self.b_vals = np.linspace(b_min, b_max, grid_size)
+        self.window = window
+        self.trig_polynomial = TrigPolynomial()
+        self.sums = None
+        self.r2 = None
+
+        ## points are only kept around so they can be downdated when they leave the window
+        self.window_points = deque()
+
+        ## pairs are enumerated with b1 in the outer loop like the grid search
+        self.b1_idx, self.b2_idx = np.divmod(np.arange(grid_size * grid_size), grid_size)
+
+    def batch_sums(self, x_vals, y_vals):
+        cos_cols, sin_cols = self.trig_polynomial.trig_basis_columns(self.b_vals, x_vals)
+        return self.trig_polynomial.normal_equation_sums(cos_cols, sin_cols, y_vals)
+
+    ## appends a batch of points, drops the points that fall out of the window
+    ## and returns the updated model and r^2
+    def update(self, x_vals, y_vals):
+        x_vals = np.atleast_1d(np.asarray(x_vals, dtype=float))
+        y_vals = np.atleast_1d(np.asarray(y_vals, dtype=float))
+        if len(x_vals) != len(y_vals):
+            raise ValueError("there must be an equal number of x- and y-values")
+
+        new_sums = self.batch_sums(x_vals, y_vals)
+        if self.sums is None:
+            self.sums = new_sums
+        else:
+            self.sums = {key: self.sums[key] + new_sums[key] for key in self.sums}
+
+        if self.window is not None:
+            self.window_points.extend(zip(x_vals, y_vals))
+            num_expired = max(len(self.window_points) - self.window, 0)
+            if num_expired > 0:
+                expired = np.array([self.window_points.popleft() for _ in range(num_expired)])
+                old_sums = self.batch_sums(expired[:, 0], expired[:, 1])
+                self.sums = {key: self.sums[key] - old_sums[key] for key in self.sums}
+
+        self.select_optimal_trig_polynomial()
+        return self.trig_polynomial, self.r2
+
+    ## re-selects the pair with the smallest sum of squared residuals using only the accumulated sums
+    def select_optimal_trig_polynomial(self):
+        ATA, ATy = self.trig_polynomial.assemble_normal_equations(self.sums, self.b1_idx, self.b2_idx)
+        coefs = np.empty(ATy.shape)
+
+        ## with b1 = 0 the cos column equals the intercept column and with b2 = 0 the sin column is zero,
+        ## so those pairs are always rank deficient and are solved from the remaining columns instead
+        b1_zero = self.b_vals[self.b1_idx] == 0
+        b2_zero = self.b_vals[self.b2_idx] == 0
+        reduced = b1_zero | b2_zero
+        singular = np.zeros(len(ATy), dtype=bool)
+        coefs[~reduced], singular[~reduced] = self.solve_normal_equations(ATA[~reduced], ATy[~reduced])
+        coefs[reduced], singular[reduced] = self.solve_reduced_normal_equations(
+            ATA[reduced], ATy[reduced], b1_zero[reduced], b2_zero[reduced]
+        )
+
+        ## for a least squares solution ||y - A coefs||^2 = y^T y - coefs^T A^T y
+        errors = self.sums["sum_y2"] - np.einsum("ij,ij->i", coefs, ATy)
+        if singular.any():
+            if self.window is not None:
+                self.solve_from_window_points(singular, coefs, errors)
+            else:
+                ## without a window the points are gone, so fall back to the minimum norm solution
+                coefs[singular] = (np.linalg.pinv(ATA[singular]) @ ATy[singular, :, None])[..., 0]
+                errors[singular] = self.sums["sum_y2"] - np.einsum("ij,ij->i", coefs[singular], ATy[singular])
+
+        ## errors from the sums can come out slightly negative through cancellation when y is
+        ## (almost) fitted exactly
+        errors = np.maximum(errors, 0)
+        k = np.argmin(errors)
+        self.r2 = self.rsquared(errors[k])
+        self.trig_polynomial.set_optimal_trig_polynomial(
+            None,
+            None,
+            coefs[k],
+            self.b_vals[self.b1_idx[k]],
+            self.b_vals[self.b2_idx[k]],
+            self.r2,
+        )
+
+    ## solves the batched normal equations and flags the pairs that are too ill-conditioned to solve
+    ## this way, using the same threshold as the batched engine; their coefs are left as nan
+    def solve_normal_equations(self, ATA, ATy):
+        singular = np.linalg.cond(ATA) > 1 / np.sqrt(np.finfo(float).eps)
+        coefs = np.full(ATy.shape, np.nan)
+        if not singular.all():
+            coefs[~singular] = np.linalg.solve(ATA[~singular], ATy[~singular, :, None])[..., 0]
+        return coefs, singular
+
+    ## solves the pairs with b1 = 0 and/or b2 = 0 from the 2x2 system of the intercept and the other
+    ## column and expands the solution to the minimum norm one of the full 3x3 system, like lstsq
+    ## gives: for b1 = 0 the intercept is split evenly between the constant and cos(0x) = 1 terms
+    def solve_reduced_normal_equations(self, ATA, ATy, b1_zero, b2_zero):
+        kept = np.stack([np.zeros(len(ATy), dtype=int), np.where(b1_zero, 2, 1)], axis=1)
+        reduced_ATA = np.take_along_axis(np.take_along_axis(ATA, kept[:, :, None], 1), kept[:, None, :], 2)
+        reduced_ATy = np.take_along_axis(ATy, kept, 1)
+
+        ## when both frequencies are 0 only the intercept is left: the kept sin column is zero, so a unit
+        ## diagonal entry makes its coefficient 0
+        both_zero = b1_zero & b2_zero
+        reduced_ATA[both_zero, 1, 1] = 1
+
+        reduced_coefs, singular = self.solve_normal_equations(reduced_ATA, reduced_ATy)
+        coefs = np.zeros(ATy.shape)
+        coefs[:, 0] = reduced_coefs[:, 0]
+        np.put_along_axis(coefs, kept[:, [1]], reduced_coefs[:, [1]], 1)
+        coefs[b1_zero, 0] = coefs[b1_zero, 1] = reduced_coefs[b1_zero, 0] / 2
+        return coefs, singular
+
+    ## truly ill-conditioned pairs (e.g. short windows at low frequencies) are refitted with lstsq on the
+    ## design matrix of the points in the window, like the batched engine does for the whole data set
+    def solve_from_window_points(self, singular, coefs, errors):
+        x_vals, y_vals = np.array(self.window_points).T
+        for k in np.flatnonzero(singular):
+            b1, b2 = self.b_vals[self.b1_idx[k]], self.b_vals[self.b2_idx[k]]
+            A = np.column_stack([np.ones(len(y_vals)), np.cos(b1 * x_vals), np.sin(b2 * x_vals)])
+            coefs[k] = np.linalg.lstsq(A, y_vals, rcond=None)[0]
+            errors[k] = np.sum((y_vals - A @ coefs[k]) ** 2)
+
+    ## same r^2 as TrigPolynomial.calculate_rsquared, which divides the squared residuals by the
+    ## 2-norm of y_preds - mean(y). the model has an intercept, so that norm is the square root of
+    ## the explained sum of squares sum((y - mean(y))^2) - sum((y - y_preds)^2)
+    ## like calculate_rsquared it is nan when the fit explains nothing (e.g. constant y); explained
+    ## sums within the rounding error of the accumulated sums count as nothing
+    def rsquared(self, sum_squared_regression):
+        total_sum_of_squares = self.sums["sum_y2"] - self.sums["sum_y"] ** 2 / self.sums["n"]
+        explained_sum_of_squares = total_sum_of_squares - sum_squared_regression
+        if explained_sum_of_squares <= self.sums["n"] * np.finfo(float).eps * self.sums["sum_y2"]:
+            return np.nan
+        return 1 - sum_squared_regression / np.sqrt(explained_sum_of_squares)
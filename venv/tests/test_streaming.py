@@ -0,0 +1,113 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from streaming import StreamingTrigPolynomial
+from trig_polynomials import TrigPolynomial
+from years import from_dates_to_year_fractions
+
+tests_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_sunspots():
+    df = pd.read_csv(os.path.join(tests_dir, "sunspots.csv"))
+    return from_dates_to_year_fractions(df["date"]), df["swpc_ssn"].to_numpy(dtype=float)
+
+
+## refits the points from scratch: lstsq on the design matrix of every pair, keeping the first
+## pair with the smallest sum of squared residuals in the same b1-outer order as the grid search
+def brute_force_fit(x_vals, y_vals, b_vals):
+    best = None
+    for b1 in b_vals:
+        for b2 in b_vals:
+            A = np.column_stack([np.ones(len(x_vals)), np.cos(b1 * x_vals), np.sin(b2 * x_vals)])
+            coefs = np.linalg.lstsq(A, y_vals, rcond=None)[0]
+            error = np.sum((y_vals - A @ coefs) ** 2)
+            if best is None or error < best[0]:
+                best = (error, b1, b2, coefs)
+    return best
+
+
+def assert_matches_refit(streaming, x_vals, y_vals, rtol=1e-6):
+    trig_polynomial = streaming.trig_polynomial
+    error, b1, b2, coefs = brute_force_fit(x_vals, y_vals, streaming.b_vals)
+    assert trig_polynomial.b1 == b1
+    assert trig_polynomial.b2 == b2
+    np.testing.assert_allclose(trig_polynomial.coefs, coefs, rtol=rtol, atol=rtol * np.abs(coefs).max())
+
+    ## r^2 is reported with the same definition as TrigPolynomial.calculate_rsquared,
+    ## which is undefined when three or fewer points are fitted exactly
+    if len(x_vals) <= 3:
+        return
+    refit = TrigPolynomial()
+    refit.set_trig_polynomial(coefs, b1, b2)
+    np.testing.assert_allclose(streaming.r2, refit.calculate_rsquared(x_vals, y_vals), rtol=rtol)
+
+
+@pytest.mark.parametrize("window", [None, 40])
+def test_mixed_batches_match_refit(window):
+    x_vals, y_vals = load_sunspots()
+    x_vals, y_vals = x_vals[:300], y_vals[:300]
+    streaming = StreamingTrigPolynomial(0, 2, grid_size=12, window=window)
+
+    ## single points, small batches and a batch larger than the window. the first batch has more
+    ## points than coefficients, otherwise every pair fits exactly and the chosen pair is arbitrary
+    start = 0
+    for batch_size in [5, 1, 1, 17, 3, 60, 1, 90, 2, 1, 119]:
+        stop = start + batch_size
+        streaming.update(x_vals[start:stop], y_vals[start:stop])
+        first = 0 if window is None else max(stop - window, 0)
+        ## without a window the near singular pairs of the first few days can only be solved from the sums
+        assert_matches_refit(streaming, x_vals[first:stop], y_vals[first:stop], 1e-4 if window is None else 1e-6)
+        start = stop
+
+
+def test_scalar_update_matches_refit():
+    x_vals, y_vals = load_sunspots()
+    streaming = StreamingTrigPolynomial(0, 2, grid_size=8, window=10)
+    for i in range(30):
+        streaming.update(x_vals[i], y_vals[i])
+    assert_matches_refit(streaming, x_vals[20:30], y_vals[20:30])
+
+
+## short windows make the low frequency pairs near singular, after thousands of downdates the
+## normal equations alone gave coefficients that were off by about 1%
+def test_near_singular_window_after_downdates():
+    x_vals, y_vals = load_sunspots()
+    window = 50
+    streaming = StreamingTrigPolynomial(0, 2, grid_size=20, window=window)
+    streaming.update(x_vals[:7700], y_vals[:7700])
+    for i in range(7700, 7800):
+        streaming.update(x_vals[i], y_vals[i])
+        if i % 13 == 0 or i == 7765:
+            assert_matches_refit(streaming, x_vals[i + 1 - window : i + 1], y_vals[i + 1 - window : i + 1])
+
+
+## pairs with b1 = 0 or b2 = 0 are rank deficient by construction but are solved from the sums,
+## so a long window needs no refit from the window points
+def test_zero_frequency_pairs_solved_from_sums(monkeypatch):
+    x_vals, y_vals = load_sunspots()
+    streaming = StreamingTrigPolynomial(0, 2, grid_size=5, window=2000)
+    refits = []
+    monkeypatch.setattr(streaming, "solve_from_window_points", lambda singular, *args: refits.append(singular))
+    streaming.update(x_vals[:3000], y_vals[:3000])
+    streaming.update(x_vals[3000:3010], y_vals[3000:3010])
+    assert refits == []
+    assert_matches_refit(streaming, x_vals[1010:3010], y_vals[1010:3010])
+
+
+@pytest.mark.parametrize("window", [None, 20])
+def test_constant_series_rsquared_is_nan(window):
+    x_vals, _ = load_sunspots()
+    streaming = StreamingTrigPolynomial(0, 2, grid_size=8, window=window)
+    _, r2 = streaming.update(x_vals[:50], np.full(50, 7.3))
+    assert np.isnan(r2)
+    np.testing.assert_allclose(streaming.trig_polynomial.polynomial_function(x_vals[:50]), 7.3)
+
+
+def test_unequal_lengths_raise():
+    streaming = StreamingTrigPolynomial(0, 2, grid_size=4)
+    with pytest.raises(ValueError):
+        streaming.update([1.0, 2.0], [1.0])
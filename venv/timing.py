@@ -0,0 +1,35 @@
+import time
+from contextlib import contextmanager, nullcontext
+
+
+class StageTimer:
+    ## records the wall clock time spent in each named stage of the fit pipeline
+    ## stages can be nested, in which case the time of the inner stage is not counted in the outer one
+    def __init__(self):
+        self.timings = {}
+        self.stack = []
+
+    @contextmanager
+    def stage(self, name):
+        self.stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self.stack.pop()
+            self.timings[name] = self.timings.get(name, 0.0) + elapsed - nested
+            if self.stack:
+                self.stack[-1] += elapsed
+
+    def total(self):
+        return sum(self.timings.values())
+
+
+class NullTimer:
+    ## used when instrumentation is off so call sites don't need to check for a timer
+    def stage(self, name):
+        return nullcontext()
+
+
+null_timer = NullTimer()
@@ -0,0 +1,555 @@
+import copy
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from numpy import cos, prod, sin, sinc, tan
+from numpy.linalg import inv, lstsq
+
+from timing import null_timer
+
+
+class FittedTrigPolynomial:
+    ## a fitted trig polynomial that can be evaluated at a single x or a whole array of x values at once
+    def __init__(self, coefs, b1, b2):
+        self.coefs = np.asarray(coefs, dtype=float)
+        self.b1, self.b2 = b1, b2
+
+    def __call__(self, x):
+        x = np.asarray(x, dtype=float)
+        return self.coefs[0] + self.coefs[1] * cos(self.b1 * x) + self.coefs[2] * sin(self.b2 * x)
+
+
+class TrigPolynomial:
+    ## identifies the basis functions, e.g. for keying cached fits
+    basis = "1,cos(b1*x),sin(b2*x)"
+
+    ## timer is an optional StageTimer that records the time spent calculating r^2
+    def __init__(self, timer=null_timer):
+        self.timer = timer
+        self.polynomial_string = ""
+        self.coefficient_string = ""
+        self.r2_string = ""
+        self.polynomial_function = None
+        self.num_solves = 0
+        self.num_periodogram_frequencies = 0
+        self.b1, self.b2, self.coefs, self.r2 = None, None, None, None
+
+    ## this solves the least squares problem using trigonometric basis functions
+    ## and generates a function that can be evaluated at x
+    def trig_basis_functions(self, b1, b2, x):
+        return [1, cos(b1 * x), sin(b2 * x)]
+
+    def generate_lstsq_coefficients(self, x_vals, y_vals, b1, b2):
+        ## we find the least squares solution to ATAx = ATb where b is the y_vals
+        A = np.array([self.trig_basis_functions(b1, b2, x) for x in x_vals])
+
+        ## choose the smallest possible values for free variables (e.g. 0)
+        coefs = lstsq(A, y_vals, rcond=None)[0]
+        return coefs
+
+    ## sets the polynomial_function attribute as a fitted model that can be evaluated at x
+    ## x can be a single value or an array, in which case all values are evaluated at once
+    def set_trig_polynomial(self, coefs, b1, b2):
+        self.polynomial_function = FittedTrigPolynomial(coefs, b1, b2)
+
+    ## a function to calculate error and help optimize the grid search
+    def calculate_error(self, x_vals, y_vals):
+        y_preds = self.polynomial_function(x_vals)
+        error = np.sum(np.abs(np.asarray(y_vals, dtype=float) - y_preds))
+        return error
+
+    def calculate_rsquared(self, x_vals, y_vals):
+        y_preds = self.polynomial_function(x_vals)
+        sum_squared_regression = np.sum((np.asarray(y_vals, dtype=float) - y_preds) ** 2)
+        total_sum_of_squares = np.linalg.norm(y_preds - np.mean(y_vals), 2)
+        print(f"sum_squared_regression={sum_squared_regression}")
+        print(f"total_sum_of_squares={total_sum_of_squares}")
+        return 1 - (sum_squared_regression / total_sum_of_squares)
+
+    ## builds the cos and sin columns of the design matrix for every candidate frequency at once
+    ## row i of each matrix corresponds to b_vals[i], so cos only depends on b1 and sin only on b2
+    def trig_basis_columns(self, b_vals, x_vals):
+        bx = np.outer(b_vals, x_vals)
+        return cos(bx), sin(bx)
+
+    ## solves the least squares problem for every (b1, b2) pair in the grid using batched 3x3 normal equations
+    ## returns the (error, b1, b2, coefs) of the pair with the smallest absolute error
+    ## start and stop restrict the search to a contiguous shard of the flattened grid
+    ## chunk_elements bounds the size of the per-chunk temporaries, which have a row of n points per pair,
+    ## so memory use stays bounded however many points there are
+    def batched_grid_search(self, x_vals, y_vals, b_vals, chunk_elements=2**21, start=0, stop=None):
+        x_vals = np.asarray(x_vals, dtype=float)
+        y_vals = np.asarray(y_vals, dtype=float)
+        b_vals = np.asarray(b_vals, dtype=float)
+
+        ## the cos/sin columns are computed once and reused across the whole grid
+        cos_cols, sin_cols = self.trig_basis_columns(b_vals, x_vals)
+        sums = self.normal_equation_sums(cos_cols, sin_cols, y_vals)
+        return self.search_grid_pairs(y_vals, b_vals, cos_cols, sin_cols, sums, chunk_elements, start, stop)
+
+    ## scores the pairs start..stop of the flattened grid from precomputed cos/sin columns and sums
+    def search_grid_pairs(self, y_vals, b_vals, cos_cols, sin_cols, sums, chunk_elements=2**21, start=0, stop=None):
+        grid_size = len(b_vals)
+
+        ## pairs are enumerated with b1 in the outer loop so ties resolve like the original nested loop
+        stop = grid_size * grid_size if stop is None else stop
+        b1_idx, b2_idx = np.divmod(np.arange(start, stop), grid_size)
+
+        pairs_per_chunk = max(chunk_elements // len(y_vals), 1)
+        best = None
+        for chunk_start in range(0, len(b1_idx), pairs_per_chunk):
+            i = b1_idx[chunk_start : chunk_start + pairs_per_chunk]
+            j = b2_idx[chunk_start : chunk_start + pairs_per_chunk]
+
+            ATA, ATy = self.assemble_normal_equations(sums, i, j)
+            coefs = self.solve_normal_equations(ATA, ATy, y_vals, cos_cols[i], sin_cols[j])
+
+            ## absolute error of every pair in the chunk as a single array reduction
+            y_preds = (
+                coefs[:, [0]] + coefs[:, [1]] * cos_cols[i] + coefs[:, [2]] * sin_cols[j]
+            )
+            errors = np.abs(y_vals - y_preds).sum(axis=1)
+
+            k = np.argmin(errors)
+            if best is None or errors[k] < best[0]:
+                best = (errors[k], b_vals[i[k]], b_vals[j[k]], coefs[k])
+        return best
+
+    ## grid search for many series sharing one x axis, with one series per column of y_matrix
+    ## for every (b1, b2) pair A^T A is built and factored once and all columns are solved together
+    ## error is "absolute" to select like the single series grid search, or "squared" to score pairs
+    ## from the normal equations alone, which avoids computing residuals for every column
+    ## returns arrays of the per-column (error, b1, b2, coefs)
+    def batched_multi_grid_search(self, x_vals, y_matrix, b_vals, chunk_elements=2**21, error="absolute"):
+        x_vals = np.asarray(x_vals, dtype=float)
+        y_matrix = np.asarray(y_matrix, dtype=float)
+        b_vals = np.asarray(b_vals, dtype=float)
+        grid_size, num_series = len(b_vals), y_matrix.shape[1]
+        if error not in ["absolute", "squared"]:
+            raise ValueError(f"unknown error: {error}")
+
+        cos_cols, sin_cols = self.trig_basis_columns(b_vals, x_vals)
+        sums = self.normal_equation_sums(cos_cols, sin_cols, y_matrix)
+        b1_idx, b2_idx = np.divmod(np.arange(grid_size * grid_size), grid_size)
+
+        ## absolute residuals of a chunk have a row per pair, point and series, so fewer pairs go in each chunk
+        num_rows = len(x_vals) * (num_series if error == "absolute" else 1)
+        pairs_per_chunk = max(chunk_elements // num_rows, 1)
+        best_errors = np.full(num_series, np.inf)
+        best_pairs = np.zeros(num_series, dtype=int)
+        best_coefs = np.zeros((num_series, 3))
+        for chunk_start in range(0, len(b1_idx), pairs_per_chunk):
+            i = b1_idx[chunk_start : chunk_start + pairs_per_chunk]
+            j = b2_idx[chunk_start : chunk_start + pairs_per_chunk]
+
+            ATA, ATy = self.assemble_normal_equations(sums, i, j)
+            coefs = self.solve_normal_equations(ATA, ATy, y_matrix, cos_cols[i], sin_cols[j])
+
+            if error == "absolute":
+                y_preds = (
+                    coefs[:, None, 0]
+                    + coefs[:, None, 1] * cos_cols[i][:, :, None]
+                    + coefs[:, None, 2] * sin_cols[j][:, :, None]
+                )
+                errors = np.abs(y_matrix - y_preds).sum(axis=1)
+            else:
+                ## for a least squares solution ||y - A coefs||^2 = y^T y - coefs^T A^T y
+                errors = sums["sum_y2"] - np.einsum("kcm,kcm->km", coefs, ATy)
+
+            ## the first pair with the smallest error wins for every series, like the nested loop
+            k = np.argmin(errors, axis=0)
+            improved = errors[k, np.arange(num_series)] < best_errors
+            best_errors[improved] = errors[k, np.arange(num_series)][improved]
+            best_pairs[improved] = chunk_start + k[improved]
+            best_coefs[improved] = coefs[k[improved], :, np.flatnonzero(improved)]
+
+        return best_errors, b_vals[b1_idx[best_pairs]], b_vals[b2_idx[best_pairs]], best_coefs
+
+    ## the sums that make up A^T A, A^T y and y^T y for every (b1, b2) pair, factored so that
+    ## everything but the cross term only depends on one of the two frequencies
+    ## y_vals can also be a 2-D matrix with one series per column, which share the A^T A sums
+    def normal_equation_sums(self, cos_cols, sin_cols, y_vals):
+        return {
+            "n": len(y_vals),
+            "sum_y": y_vals.sum(axis=0),
+            "sum_y2": (y_vals**2).sum(axis=0),
+            "sum_cos": cos_cols.sum(axis=1),
+            "sum_sin": sin_cols.sum(axis=1),
+            "sum_cos2": (cos_cols**2).sum(axis=1),
+            "sum_sin2": (sin_cols**2).sum(axis=1),
+            "sum_cos_sin": cos_cols @ sin_cols.T,
+            "cos_y": cos_cols @ y_vals,
+            "sin_y": sin_cols @ y_vals,
+        }
+
+    ## assembles A^T A and A^T y for the pairs with b1 index i and b2 index j
+    def assemble_normal_equations(self, sums, i, j):
+        ATA = np.empty((len(i), 3, 3))
+        ATA[:, 0, 0] = sums["n"]
+        ATA[:, 0, 1] = ATA[:, 1, 0] = sums["sum_cos"][i]
+        ATA[:, 0, 2] = ATA[:, 2, 0] = sums["sum_sin"][j]
+        ATA[:, 1, 1] = sums["sum_cos2"][i]
+        ATA[:, 1, 2] = ATA[:, 2, 1] = sums["sum_cos_sin"][i, j]
+        ATA[:, 2, 2] = sums["sum_sin2"][j]
+        sum_y = np.broadcast_to(sums["sum_y"], (len(i),) + np.shape(sums["sum_y"]))
+        ATy = np.stack([sum_y, sums["cos_y"][i], sums["sin_y"][j]], axis=1)
+        return ATA, ATy
+
+    ## batched solve of the normal equations, falling back to lstsq on the full design matrix
+    ## for ill-conditioned pairs (e.g. b=0) so the minimum norm solution matches generate_lstsq_coefficients
+    ## with a 2-D y_vals, ATy has one right hand side per series and each A^T A is factored only once
+    def solve_normal_equations(self, ATA, ATy, y_vals, cos_cols, sin_cols):
+        singular = np.linalg.cond(ATA) > 1 / np.sqrt(np.finfo(float).eps)
+        coefs = np.empty(ATy.shape)
+        if not singular.all():
+            rhs = ATy[~singular].reshape(ATy[~singular].shape[:2] + (-1,))
+            coefs[~singular] = np.linalg.solve(ATA[~singular], rhs).reshape(ATy[~singular].shape)
+        for k in np.flatnonzero(singular):
+            A = np.column_stack([np.ones(len(y_vals)), cos_cols[k], sin_cols[k]])
+            coefs[k] = lstsq(A, y_vals, rcond=None)[0]
+        return coefs
+
+    ## shards the flattened (b1, b2) grid across a process pool. the cos/sin columns and normal
+    ## equation sums are computed once here and shared with the workers through shared memory, so
+    ## each shard only scores its own pairs; shard results are reduced in grid order so ties
+    ## resolve like the serial path
+    ## the columns and sums (including the G x G x n cross term cos_cols @ sin_cols.T) stay serial,
+    ## which is about 4% of a serial search on sunspots at G=100 and 10% at G=20, so the speedup is
+    ## capped at roughly 25x and 10x before process and shared memory overhead
+    def parallel_grid_search(
+        self, x_vals, y_vals, b_vals, chunk_elements=2**21, num_workers=None, shard_size=None
+    ):
+        x_vals = np.asarray(x_vals, dtype=float)
+        y_vals = np.asarray(y_vals, dtype=float)
+        b_vals = np.asarray(b_vals, dtype=float)
+        num_pairs = len(b_vals) ** 2
+
+        cos_cols, sin_cols = self.trig_basis_columns(b_vals, x_vals)
+        sums = self.normal_equation_sums(cos_cols, sin_cols, y_vals)
+
+        ## a single worker can't win anything back from the pool overhead, so search in process
+        num_workers = num_workers or os.cpu_count() or 1
+        if num_workers == 1:
+            return self.search_grid_pairs(y_vals, b_vals, cos_cols, sin_cols, sums, chunk_elements)
+
+        arrays = {"y_vals": y_vals, "cos_cols": cos_cols, "sin_cols": sin_cols}
+        arrays.update({key: val for key, val in sums.items() if np.ndim(val) > 0})
+        scalars = {key: val for key, val in sums.items() if np.ndim(val) == 0}
+
+        ## every array is placed at its own offset of a single shared memory block
+        layout, size = {}, 0
+        for key, val in arrays.items():
+            layout[key] = (size, val.shape)
+            size += val.size * 8
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        try:
+            for key, val in attach_shared_arrays(shm.buf, layout).items():
+                val[...] = arrays[key]
+            del val
+
+            ## by default each worker gets about four shards to balance uneven shards
+            if shard_size is None:
+                shard_size = -(-num_pairs // (4 * num_workers))
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                shards = [
+                    (start, min(start + shard_size, num_pairs))
+                    for start in range(0, num_pairs, max(shard_size, 1))
+                ]
+                results = executor.map(
+                    grid_search_worker,
+                    [(shm.name, layout, scalars, b_vals, chunk_elements, start, stop) for start, stop in shards],
+                )
+
+                best = None
+                for result in results:
+                    if best is None or result[0] < best[0]:
+                        best = result
+        finally:
+            shm.close()
+            shm.unlink()
+        return best
+
+    def grid_search_polynomial_coefficients(
+        self,
+        x_vals,
+        y_vals,
+        b_min,
+        b_max,
+        grid_size=20,
+        engine="vectorized",
+        chunk_elements=2**21,
+        num_workers=None,
+        shard_size=None,
+    ):
+        if engine == "vectorized":
+            _, b1_optimal, b2_optimal, coefs_optimal = self.batched_grid_search(
+                x_vals, y_vals, np.linspace(b_min, b_max, grid_size), chunk_elements
+            )
+        elif engine == "parallel":
+            _, b1_optimal, b2_optimal, coefs_optimal = self.parallel_grid_search(
+                x_vals,
+                y_vals,
+                np.linspace(b_min, b_max, grid_size),
+                chunk_elements,
+                num_workers,
+                shard_size,
+            )
+        elif engine == "loop":
+            b1_optimal, b2_optimal, coefs_optimal = self.loop_grid_search(
+                x_vals, y_vals, b_min, b_max, grid_size
+            )
+        else:
+            raise ValueError(f"unknown grid search engine: {engine}")
+        self.num_solves = grid_size * grid_size
+        self.num_periodogram_frequencies = 0
+
+        ## the optimal trig polynomial can be set outside of the grid search
+        self.set_optimal_trig_polynomial(x_vals, y_vals, coefs_optimal, b1_optimal, b2_optimal)
+
+    ## the original python loop over the grid, kept as a reference for the vectorized engine
+    def loop_grid_search(self, x_vals, y_vals, b_min, b_max, grid_size=20):
+
+        ## optimize the best b1,b2 values for the polynomial to minimize error
+        test_trig_polynomial = copy.deepcopy(self)
+
+        ## initialize the error to None
+        error = None
+        for b1 in np.linspace(b_min, b_max, grid_size):
+            for b2 in np.linspace(b_min, b_max, grid_size):
+
+                ## generate coefs for the new iteration of the loop
+                coefs = self.generate_lstsq_coefficients(x_vals, y_vals, b1, b2)
+                test_trig_polynomial.set_trig_polynomial(coefs, b1, b2)
+                new_error = test_trig_polynomial.calculate_error(x_vals, y_vals)
+
+                ## this sets the base level of error on the first iteration of the loop
+                if error is None or new_error < error:
+                    error = new_error
+                    b1_optimal, b2_optimal = b1, b2
+                    coefs_optimal = coefs
+
+        return b1_optimal, b2_optimal, coefs_optimal
+
+    ## sets the polynomial function along with the latex strings displayed in the app
+    ## r2 can be passed in when it is already known (e.g. from a cached fit)
+    def set_optimal_trig_polynomial(self, x_vals, y_vals, coefs, b1, b2, r2=None):
+        self.set_trig_polynomial(coefs, b1, b2)
+        self.b1, self.b2, self.coefs = b1, b2, coefs
+        if r2 is None:
+            with self.timer.stage("r2"):
+                r2 = self.calculate_rsquared(x_vals, y_vals)
+        self.r2 = r2
+
+        self.coefficient_string = (
+            "$$\\hat{y}(x) = \\begin{bmatrix} "
+            + " & ".join(["{:.2f}".format(coef) for coef in coefs])
+            + " \\end{bmatrix} "
+        )
+        self.polynomial_string = (
+            "\\begin{bmatrix} 1 & "
+            + f"\\cos {b1:.2f}x & \\sin {b2:.2f}x"
+            + " \\end{bmatrix}^T"
+        )
+        self.r2_string = (
+            f", r^2 = {self.r2:.2f}$$"
+        )
+
+    ## the parameters of the optimal fit as plain python types
+    def fitted_parameters(self):
+        return {
+            "b1": float(self.b1),
+            "b2": float(self.b2),
+            "coefs": [float(coef) for coef in self.coefs],
+            "r2": float(self.r2),
+        }
+
+    ## lomb-scargle periodogram of (possibly unevenly spaced) data at each angular frequency in b_vals
+    ## frequencies are processed in chunks of at most chunk_elements frequency-point products
+    ## so memory stays bounded for wide frequency ranges and long series
+    def lomb_scargle_periodogram(self, x_vals, y_vals, b_vals, chunk_elements=2**21):
+        x_vals = np.asarray(x_vals, dtype=float)
+        y_vals = np.asarray(y_vals, dtype=float) - np.mean(y_vals)
+        power = np.zeros(len(b_vals))
+        chunk_size = max(chunk_elements // len(x_vals), 1)
+        for start in range(0, len(b_vals), chunk_size):
+            b = np.asarray(b_vals[start : start + chunk_size], dtype=float)
+
+            ## projecting y onto span{cos(bx), sin(bx)} gives the same power as the classic form with
+            ## the time offset tau, without the extra trig evaluations of the shifted angles
+            cos_bx, sin_bx = cos(np.outer(b, x_vals)), sin(np.outer(b, x_vals))
+            cos_y, sin_y = cos_bx @ y_vals, sin_bx @ y_vals
+            cos2 = np.einsum("ij,ij->i", cos_bx, cos_bx)
+            cos_sin = np.einsum("ij,ij->i", cos_bx, sin_bx)
+            sin2 = len(x_vals) - cos2
+
+            ## near a zero frequency the sin component vanishes, so its power is left at 0
+            det = cos2 * sin2 - cos_sin**2
+            degenerate = det <= np.sqrt(np.finfo(float).eps) * len(x_vals) ** 2
+            with np.errstate(divide="ignore", invalid="ignore"):
+                chunk_power = (sin2 * cos_y**2 - 2 * cos_sin * cos_y * sin_y + cos2 * sin_y**2) / det
+            power[start : start + chunk_size] = np.where(degenerate, 0, chunk_power) / 2
+        return power
+
+    ## returns up to num_peaks frequencies at local maxima of the periodogram, strongest first
+    def periodogram_peaks(self, b_vals, power, num_peaks=3):
+        padded = np.concatenate([[-np.inf], power, [-np.inf]])
+        is_peak = (padded[1:-1] >= padded[:-2]) & (padded[1:-1] > padded[2:])
+        peaks = np.flatnonzero(is_peak)
+        peaks = peaks[np.argsort(power[peaks])[::-1]][:num_peaks]
+        return np.asarray(b_vals)[peaks]
+
+    ## variable projection residual: for fixed b1, b2 the linear coefficients are solved in closed form
+    ## so the sum of squared residuals only depends on the frequencies
+    def variable_projection_residual(self, x_vals, y_vals, b1, b2):
+        A = np.column_stack([np.ones(len(x_vals)), cos(b1 * x_vals), sin(b2 * x_vals)])
+        coefs = lstsq(A, y_vals, rcond=None)[0]
+        self.num_solves += 1
+        return np.sum((y_vals - A @ coefs) ** 2), coefs
+
+    ## a small nelder-mead simplex search, with points clipped to the frequency bounds
+    ## it stops once the simplex is smaller than xtol or after max_evals evaluations of f
+    def nelder_mead(self, f, x0, step, bounds, xtol=1e-6, max_evals=30):
+        lower, upper = bounds
+        num_evals = 0
+
+        def evaluate(point):
+            nonlocal num_evals
+            num_evals += 1
+            return f(*point)
+
+        ## the initial vertices step inwards when x0 sits on the upper bound
+        simplex = [x0]
+        for axis in range(len(x0)):
+            vertex = x0.copy()
+            vertex[axis] += step if x0[axis] + step <= upper else -step
+            simplex.append(vertex)
+        simplex = np.clip(simplex, lower, upper)
+        values = np.array([evaluate(point) for point in simplex])
+        while num_evals < max_evals:
+            order = np.argsort(values)
+            simplex, values = simplex[order], values[order]
+            if np.abs(simplex[1:] - simplex[0]).max() <= xtol:
+                break
+
+            centroid = simplex[:-1].mean(axis=0)
+            reflected = np.clip(2 * centroid - simplex[-1], lower, upper)
+            reflected_value = evaluate(reflected)
+            if reflected_value < values[0]:
+                expanded = np.clip(3 * centroid - 2 * simplex[-1], lower, upper)
+                expanded_value = evaluate(expanded)
+                if expanded_value < reflected_value:
+                    simplex[-1], values[-1] = expanded, expanded_value
+                else:
+                    simplex[-1], values[-1] = reflected, reflected_value
+            elif reflected_value < values[-2]:
+                simplex[-1], values[-1] = reflected, reflected_value
+            else:
+                contracted = (centroid + simplex[-1]) / 2
+                contracted_value = evaluate(contracted)
+                if contracted_value < values[-1]:
+                    simplex[-1], values[-1] = contracted, contracted_value
+                else:
+                    ## shrink every point towards the best one
+                    simplex[1:] = (simplex[0] + simplex[1:]) / 2
+                    values[1:] = [evaluate(point) for point in simplex[1:]]
+        return simplex[np.argmin(values)]
+
+    ## seeds candidate frequencies from the lomb-scargle periodogram, then refines the best
+    ## seed pairs with nelder-mead on the variable projection residual
+    ## besides num_solves, the number of frequencies the periodogram was evaluated at is recorded
+    ## in num_periodogram_frequencies, each of which costs about as much as one least squares solve
+    ## short baselines give a coarse periodogram, so at least min_frequencies are always evaluated
+    def periodogram_search_polynomial_coefficients(
+        self,
+        x_vals,
+        y_vals,
+        b_min,
+        b_max,
+        num_peaks=3,
+        num_refined=2,
+        oversampling=3,
+        min_frequencies=32,
+        max_evals=30,
+    ):
+        x_vals = np.asarray(x_vals, dtype=float)
+        y_vals = np.asarray(y_vals, dtype=float)
+        self.num_solves = 0
+
+        ## the periodogram resolution is set by the baseline of the data
+        baseline = max(np.ptp(x_vals), np.finfo(float).eps)
+        resolution = 2 * np.pi / (baseline * oversampling)
+        num_frequencies = max(int(np.ceil((b_max - b_min) / resolution)) + 1, min_frequencies)
+        b_vals = np.linspace(b_min, b_max, num_frequencies)
+        self.num_periodogram_frequencies = len(b_vals)
+        seeds = self.periodogram_peaks(b_vals, self.lomb_scargle_periodogram(x_vals, y_vals, b_vals), num_peaks)
+        if len(seeds) == 0:
+            seeds = b_vals[[0]]
+
+        ## score every pairing of the seed frequencies and refine the best few
+        seed_pairs = sorted(
+            ((self.variable_projection_residual(x_vals, y_vals, b1, b2)[0], b1, b2) for b1 in seeds for b2 in seeds),
+            key=lambda pair: pair[0],
+        )
+        best = None
+        for _, b1, b2 in seed_pairs[:num_refined]:
+            b1, b2 = self.nelder_mead(
+                lambda b1, b2: self.variable_projection_residual(x_vals, y_vals, b1, b2)[0],
+                np.array([b1, b2]),
+                step=min(resolution, b_max - b_min),
+                bounds=(b_min, b_max),
+                xtol=resolution / 100,
+                max_evals=max_evals,
+            )
+            residual, coefs = self.variable_projection_residual(x_vals, y_vals, b1, b2)
+            if best is None or residual < best[0]:
+                best = (residual, b1, b2, coefs)
+
+        _, b1_optimal, b2_optimal, coefs_optimal = best
+        self.set_optimal_trig_polynomial(x_vals, y_vals, coefs_optimal, b1_optimal, b2_optimal)
+
+
+## fits one TrigPolynomial per column of y_matrix with a single batched grid search over the shared x axis
+def fit_multiple_series(x_vals, y_matrix, b_min, b_max, grid_size=20, chunk_elements=2**21, error="absolute"):
+    y_matrix = np.asarray(y_matrix, dtype=float)
+    _, b1_optimal, b2_optimal, coefs_optimal = TrigPolynomial().batched_multi_grid_search(
+        x_vals, y_matrix, np.linspace(b_min, b_max, grid_size), chunk_elements, error
+    )
+
+    trig_polynomials = []
+    for col in range(y_matrix.shape[1]):
+        trig_polynomial = TrigPolynomial()
+        trig_polynomial.set_optimal_trig_polynomial(
+            x_vals, y_matrix[:, col], coefs_optimal[col], b1_optimal[col], b2_optimal[col]
+        )
+        trig_polynomial.num_solves = grid_size * grid_size
+        trig_polynomials.append(trig_polynomial)
+    return trig_polynomials
+
+
+## float64 views of the arrays described by layout, which maps names to (offset, shape)
+def attach_shared_arrays(buf, layout):
+    return {
+        key: np.ndarray(shape, dtype=float, buffer=buf, offset=offset)
+        for key, (offset, shape) in layout.items()
+    }
+
+
+## runs in a pool process: attaches to the shared columns and sums and searches one shard of the grid
+def grid_search_worker(args):
+    shm_name, layout, scalars, b_vals, chunk_elements, start, stop = args
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        arrays = attach_shared_arrays(shm.buf, layout)
+        y_vals, cos_cols, sin_cols = arrays.pop("y_vals"), arrays.pop("cos_cols"), arrays.pop("sin_cols")
+        sums = {**scalars, **arrays}
+        result = TrigPolynomial().search_grid_pairs(
+            y_vals, b_vals, cos_cols, sin_cols, sums, chunk_elements, start, stop
+        )
+        del arrays, sums, y_vals, cos_cols, sin_cols
+    finally:
+        shm.close()
+    return result
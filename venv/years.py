@@ -0,0 +1,72 @@
+import time
+from datetime import datetime as dt
+from math import floor
+
+import numpy as np
+import pandas as pd
+
+
+# returns seconds since epoch
+def sinceEpoch(date):
+    return pd.DatetimeIndex([date]).astype(int)[0] / 10**9
+
+
+## timezone-aware dates are taken at their local wall clock time, so a date counts towards the
+## calendar year it is written in, e.g. 2020-01-01T00:00:00+05:00 is 2020.0
+def from_date_to_year_fraction(date):
+    date = pd.Timestamp(date)
+    if date.tzinfo is not None:
+        date = date.tz_localize(None)
+    s = sinceEpoch
+    year = date.year
+    startOfThisYear = dt(year=year, month=1, day=1)
+    startOfNextYear = dt(year=year + 1, month=1, day=1)
+    yearElapsed = s(date) - s(startOfThisYear)
+    yearDuration = s(startOfNextYear) - s(startOfThisYear)
+    fraction = yearElapsed / yearDuration
+    return date.year + fraction
+
+
+def from_year_fraction_to_date(year_fraction):
+    year = floor(year_fraction)
+    fraction = year_fraction - year
+    startOfThisYear = dt(year=year, month=1, day=1)
+    startOfNextYear = dt(year=year + 1, month=1, day=1)
+    s = sinceEpoch
+    yearDuration = s(startOfNextYear) - s(startOfThisYear)
+    yearElapsed = fraction * yearDuration
+    date_since_epoch_in_ns = (yearElapsed + s(startOfThisYear)) * 10**9
+    return pd.Timestamp(date_since_epoch_in_ns, unit="ns")
+
+
+## vectorized counterpart of from_date_to_year_fraction for a whole Series, list or array of dates
+## timezone-aware dates are taken at their local wall clock time, like the scalar version
+def from_dates_to_year_fractions(dates):
+    try:
+        dates = pd.DatetimeIndex(pd.to_datetime(dates))
+    except ValueError:
+        ## dates with different utc offsets can't share one timezone, so drop them one by one
+        dates = pd.DatetimeIndex([pd.Timestamp(date).tz_localize(None) for date in dates])
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    dates = dates.values.astype("datetime64[ns]")
+    startOfThisYear = dates.astype("datetime64[Y]")
+    startOfNextYear = startOfThisYear + 1
+    s = lambda d: d.astype("datetime64[ns]").astype("int64") / 10**9
+    yearElapsed = s(dates) - s(startOfThisYear)
+    yearDuration = s(startOfNextYear) - s(startOfThisYear)
+    return startOfThisYear.astype("int64") + 1970 + yearElapsed / yearDuration
+
+
+## vectorized counterpart of from_year_fraction_to_date, returns a DatetimeIndex
+def from_year_fractions_to_dates(year_fractions):
+    year_fractions = np.asarray(year_fractions, dtype=float)
+    year = np.floor(year_fractions)
+    fraction = year_fractions - year
+    startOfThisYear = (year - 1970).astype("int64").astype("datetime64[Y]")
+    startOfNextYear = startOfThisYear + 1
+    s = lambda d: d.astype("datetime64[ns]").astype("int64") / 10**9
+    yearDuration = s(startOfNextYear) - s(startOfThisYear)
+    yearElapsed = fraction * yearDuration
+    date_since_epoch_in_ns = (yearElapsed + s(startOfThisYear)) * 10**9
+    return pd.to_datetime(date_since_epoch_in_ns, unit="ns")